@@ -7,8 +7,15 @@ from src.engine import ChessEngine
 from src.board import ChessBoard
 from src.evaluation import Evaluator
 from src.opening_book import OpeningBook
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import time
 import chess
 
+# Moves used by the examples, parsed once at import
+_D2D4 = chess.Move.from_uci("d2d4")
+
 
 def example_1_basic_search():
     """Example 1: Find the best move in a position."""
@@ -36,27 +43,30 @@ def example_2_position_evaluation():
     print("Example 2: Position Evaluation")
     print("=" * 60)
     
+    # Only material and piece placement are compared here, so use
+    # evaluate_base(), which reads the bitboards alone
+    
     # Starting position
     board = chess.Board()
-    score = Evaluator.evaluate(board)
+    score = Evaluator.evaluate_base(board)
     print(f"Starting position: {score} cp ({score/100:.2f} pawns)")
     
     # After 1.e4
     board.push_san("e4")
-    score = Evaluator.evaluate(board)
+    score = Evaluator.evaluate_base(board)
     print(f"After 1.e4: {score} cp")
     
     # After 1.e4 c5
     board.push_san("c5")
-    score = Evaluator.evaluate(board)
+    score = Evaluator.evaluate_base(board)
     print(f"After 1.e4 c5 (Sicilian): {score} cp")
     
     # Tactical position - White is up material
     board = chess.Board("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
     board.push_san("e4")
-    board.push_san("e5")
-    board.push_san("Nxe5")  # White captures pawn
-    score = Evaluator.evaluate(board)
+    board.push_san("d5")
+    board.push_san("exd5")  # White captures pawn
+    score = Evaluator.evaluate_base(board)
     print(f"White up a pawn: {score} cp (should be ~100)")
     print()
 
@@ -79,13 +89,13 @@ def example_3_game_simulation():
             break
         
         # Make move
-        board.make_move(move)
+        board.make_move_trusted(move)
         move_count += 1
         
-        # Print position
-        san = board.get_move_san(move)
-        print(f"Move {(move_count+1)//2}: {san}")
+        print(f"Move {(move_count+1)//2}: {board.get_move_display(move)}")
     
+    # Render the game in SAN in a single pass
+    print(f"Game: {board.board.root().variation_san(board.board.move_stack)}")
     print(f"Game ended after {move_count} moves")
     print(f"Final FEN: {board.get_fen()}")
     print()
@@ -97,17 +107,18 @@ def example_4_opening_book():
     print("Example 4: Opening Book")
     print("=" * 60)
     
-    book = OpeningBook()
+    # Uses a Polyglot book if data/book.bin exists, else the built-in moves
+    book = OpeningBook.from_polyglot("data/book.bin")
     board = chess.Board()
     
     # Get book move
-    move = book.get_move(board.fen())
+    move = book.lookup(board)
     print(f"Book move from starting position: {move.uci() if move else 'None'}")
     
     # Add custom opening
     book.add_opening(
         chess.STARTING_FEN,
-        chess.Move.from_uci("d2d4")
+        _D2D4
     )
     
     # Save book
@@ -157,25 +168,37 @@ def example_6_time_management():
     
     board = chess.Board()
     
+    # One engine for all time controls; its transposition table carries over
+    engine = ChessEngine(depth=6, time_limit=4.0)
+    
     # Blitz settings
     print("Blitz (3+2):")
-    engine_blitz = ChessEngine(depth=4, time_limit=1.5)
-    move = engine_blitz.find_best_move(board, time_available=1.5)
+    move = engine.find_best_move(board, time_available=1.5, max_depth=4)
     print(f"Move: {move.uci()}, Time: quick\n")
     
     # Rapid settings
     print("Rapid (10+0):")
-    engine_rapid = ChessEngine(depth=6, time_limit=4.0)
-    move = engine_rapid.find_best_move(board, time_available=4.0)
+    move = engine.find_best_move(board, time_available=4.0, max_depth=6)
     print(f"Move: {move.uci()}, Time: thoughtful\n")
     
     # Bullet settings
     print("Bullet (1+0):")
-    engine_bullet = ChessEngine(depth=3, time_limit=0.5)
-    move = engine_bullet.find_best_move(board, time_available=0.5)
+    move = engine.find_best_move(board, time_available=0.5, max_depth=3)
     print(f"Move: {move.uci()}, Time: instant\n")
 
 
+def _best_reply_after(fen: str, san: str) -> str:
+    """Search the position after a move; runs in a worker process."""
+    board = chess.Board(fen)
+    board.push_san(san)
+    engine = ChessEngine(depth=3, time_limit=1.0)
+    try:
+        move = engine.find_best_move(board)
+    finally:
+        engine.close()
+    return board.san(move) if move else "none"
+
+
 def example_7_comparing_positions():
     """Example 7: Compare engine evaluation across variations."""
     print("=" * 60)
@@ -193,29 +216,41 @@ def example_7_comparing_positions():
     print("After 1.e4 e5 2.Nf3 Nc6 3.Bc4")
     
     # Main line: d6
-    board_d6 = board_main.copy()
-    board_d6.push_san("d6")
-    score_d6 = Evaluator.evaluate(board_d6)
+    board_main.push_san("d6")
+    score_d6 = Evaluator.evaluate(board_main)
+    board_main.pop()
     print(f"3...d6 (Conservative): {score_d6} cp")
     
     # Aggressive: Nf6
-    board_nf6 = board_main.copy()
-    board_nf6.push_san("Nf6")
-    score_nf6 = Evaluator.evaluate(board_nf6)
+    board_main.push_san("Nf6")
+    score_nf6 = Evaluator.evaluate(board_main)
+    board_main.pop()
     print(f"3...Nf6 (Aggressive): {score_nf6} cp")
     
     # Rare: Nd4
-    board_nd4 = board_main.copy()
-    board_nd4.push_san("Nd4")
-    score_nd4 = Evaluator.evaluate(board_nd4)
+    board_main.push_san("Nd4")
+    score_nd4 = Evaluator.evaluate(board_main)
+    board_main.pop()
     print(f"3...Nd4 (Tactical): {score_nd4} cp")
     
     print(f"\nBest for Black: {'d6' if score_d6 > max(score_nf6, score_nd4) else 'Nf6' if score_nf6 > score_nd4 else 'Nd4'}")
+    
+    # The variations are independent, so search White's replies in parallel
+    fen = board_main.fen()
+    with ProcessPoolExecutor(max_workers=3) as executor:
+        futures = {san: executor.submit(_best_reply_after, fen, san) for san in ("d6", "Nf6", "Nd4")}
+        for san, future in futures.items():
+            print(f"White's reply to 3...{san}: {future.result()}")
     print()
 
 
 def main():
     """Run all examples."""
+    parser = argparse.ArgumentParser(description="Borken Chess V2 examples")
+    parser.add_argument("--bench", action="store_true", help="Run without pauses and report per-example timings")
+    parser.add_argument("--json", action="store_true", help="With --bench, print the timings as JSON")
+    args = parser.parse_args()
+    
     print("\n")
     print("╔" + "=" * 58 + "╗")
     print("║" + " " * 12 + "Borken Chess V2 Examples" + " " * 22 + "║")
@@ -231,11 +266,17 @@ def main():
         ("Time Management", example_6_time_management),
         ("Variation Comparison", example_7_comparing_positions),
     ]
+    timings = {}
     
     for i, (name, func) in enumerate(examples, 1):
         try:
+            start = time.perf_counter_ns()
             func()
-            input(f"Press Enter to continue to example {i+1}...\n")
+            timings[name] = (time.perf_counter_ns() - start) / 1e6
+            if args.bench:
+                print(f"{name}: {timings[name]:.2f} ms\n")
+            else:
+                input(f"Press Enter to continue to example {i+1}...\n")
         except KeyboardInterrupt:
             print("\n\nExamples interrupted.")
             break
@@ -245,6 +286,9 @@ def main():
     print("=" * 60)
     print("All examples completed!")
     print("=" * 60)
+    
+    if args.bench and args.json:
+        print(json.dumps({"timings_ms": timings}, indent=2))
 
 
 if __name__ == "__main__":
@@ -16,6 +16,21 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+# Scripted play (piped stdin) skips input()'s readline handling
+INTERACTIVE = sys.stdin.isatty()
+
+
+def ask(prompt: str) -> str:
+    """Prompt for a line of input; raises EOFError when input runs out."""
+    if INTERACTIVE:
+        return input(prompt)
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line.rstrip("\n")
+
 
 def play_against_engine(use_external: bool = False, engine_path: Optional[str] = None):
     """Play a full game against the engine."""
@@ -40,7 +55,7 @@ def play_against_engine(use_external: bool = False, engine_path: Optional[str] =
     print("  2 - Black (engine plays first)")
 
     while True:
-        choice = input("\nEnter 1 or 2: ").strip()
+        choice = ask("\nEnter 1 or 2: ").strip()
         if choice in ["1", "2"]:
             user_white = choice == "1"
             break
@@ -66,7 +81,7 @@ def play_against_engine(use_external: bool = False, engine_path: Optional[str] =
                 # User's turn
                 player_color = "White" if is_white else "Black"
                 while True:
-                    move_input = input(f"{player_color} to move > ").strip()
+                    move_input = ask(f"{player_color} to move > ").strip()
 
                     if move_input.lower() == "quit":
                         print("Game ended by user.")
@@ -85,7 +100,7 @@ def play_against_engine(use_external: bool = False, engine_path: Optional[str] =
 
                 if engine_move:
                     san = board.get_move_san(engine_move)
-                    board.make_move(engine_move)
+                    board.make_move_trusted(engine_move)
                     move_count += 1
                     print(f"{engine_color} plays: {san}")
                     print()
@@ -150,7 +165,7 @@ def cli_mode(use_external: bool = False, engine_path: Optional[str] = None):
             print(board.board)
             print(f"FEN: {board.get_fen()}")
 
-            user_input = input(" > ").strip().lower()
+            user_input = ask(" > ").strip().lower()
 
             if not user_input:
                 continue
@@ -15,4 +15,7 @@ setup(
         "pydantic==2.5.0",
         "aiohttp==3.9.1",
     ],
+    extras_require={
+        "dev": ["pytest", "pytest-xdist"],
+    },
 )
@@ -0,0 +1,38 @@
+"""Bitboard views of python-chess positions.
+
+python-chess already stores a position as integer bitboards (one per piece
+type plus per-colour occupancy) and generates moves from precomputed attack
+tables, so the search keeps using ``chess.Board`` for make/unmake and move
+generation. This module exposes those bitboards as twelve plain ints so that
+evaluation and move ordering can work on masks instead of ``Piece`` objects.
+"""
+import chess
+from typing import Tuple
+
+# Order of the bitboards returned by piece_bitboards():
+# white P, N, B, R, Q, K followed by black P, N, B, R, Q, K
+PIECE_ORDER = [
+    (color, piece_type)
+    for color in (chess.WHITE, chess.BLACK)
+    for piece_type in chess.PIECE_TYPES
+]
+
+
+def piece_bitboards(board: chess.BaseBoard) -> Tuple[int, ...]:
+    """Return the twelve piece bitboards of a position (see PIECE_ORDER)."""
+    white = board.occupied_co[chess.WHITE]
+    black = board.occupied_co[chess.BLACK]
+    return (
+        board.pawns & white,
+        board.knights & white,
+        board.bishops & white,
+        board.rooks & white,
+        board.queens & white,
+        board.kings & white,
+        board.pawns & black,
+        board.knights & black,
+        board.bishops & black,
+        board.rooks & black,
+        board.queens & black,
+        board.kings & black,
+    )
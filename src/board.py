@@ -1,24 +1,29 @@
 """Chess board representation and move handling."""
 import chess
-from typing import List, Tuple, Optional
+from contextlib import contextmanager
+from typing import List, Optional
 
 
 class ChessBoard:
     """Wrapper around python-chess board with additional utilities."""
-    
+
     def __init__(self, fen: str = chess.STARTING_FEN):
         """Initialize board with optional FEN string."""
         self.board = chess.Board(fen)
-        self.move_stack = []
+        self._legal_key = None
+        self._legal_cache: Optional[List[chess.Move]] = None
     
     def make_move(self, move: chess.Move) -> bool:
-        """Make a move on the board."""
-        if move in self.board.legal_moves:
-            self.board.push(move)
-            self.move_stack.append(move)
+        """Make a move on the board if it is legal."""
+        if self.board.is_legal(move):
+            self.make_move_trusted(move)
             return True
         return False
     
+    def make_move_trusted(self, move: chess.Move):
+        """Make a move already known to be legal (e.g. one chosen by the engine)."""
+        self.board.push(move)
+    
     def make_move_san(self, san_move: str) -> bool:
         """Make a move from SAN notation."""
         try:
@@ -29,7 +34,15 @@ class ChessBoard:
     
     def get_legal_moves(self) -> List[chess.Move]:
         """Get list of legal moves."""
-        return list(self.board.legal_moves)
+        self._refresh_legal_cache()
+        return list(self._legal_cache)
+    
+    def _refresh_legal_cache(self):
+        """Regenerate the cached legal moves if the position has changed."""
+        key = self.board._transposition_key()
+        if key != self._legal_key:
+            self._legal_cache = list(self.board.legal_moves)
+            self._legal_key = key
     
     def get_fen(self) -> str:
         """Get current board FEN."""
@@ -58,19 +71,46 @@ class ChessBoard:
     def copy(self) -> 'ChessBoard':
         """Create a copy of the board."""
         new_board = ChessBoard()
-        new_board.board = self.board.copy()
-        new_board.move_stack = self.move_stack.copy()
+        new_board.board = self.board.copy(stack=True)
         return new_board
     
+    @property
+    def move_stack(self) -> List[chess.Move]:
+        """Moves played on the board (the underlying board's move stack)."""
+        return self.board.move_stack
+    
     def undo_move(self) -> Optional[chess.Move]:
         """Undo the last move."""
         if self.board.move_stack:
-            move = self.board.pop()
-            if self.move_stack:
-                self.move_stack.pop()
-            return move
+            return self.board.pop()
         return None
     
+    @contextmanager
+    def push_pop(self, move: chess.Move):
+        """
+        Temporarily play a move, e.g. to evaluate the resulting position.
+        
+        Pushing and popping on one board avoids copying it per variation:
+        
+            with board.push_pop(move):
+                score = Evaluator.evaluate(board.board)
+        """
+        self.board.push(move)
+        try:
+            yield self
+        finally:
+            self.board.pop()
+    
     def get_move_san(self, move: chess.Move) -> str:
         """Get SAN notation for a move."""
         return self.board.san(move)
+    
+    def get_move_display(self, move: chess.Move, *, san: bool = False) -> str:
+        """
+        Get a move for display.
+        
+        SAN needs legal-move generation to disambiguate, so UCI is returned
+        unless san=True. To show a whole game in SAN, render it once with
+        board.root().variation_san(board.move_stack).
+        """
+        return self.board.san(move) if san else move.uci()
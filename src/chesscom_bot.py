@@ -1,8 +1,9 @@
 """Chess.com bot integration for automated play."""
 import requests
+import aiohttp
+import asyncio
 import json
-import time
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from src.engine import ChessEngine
 from src.board import ChessBoard
 import chess
@@ -10,6 +11,11 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Fallback delay between polls when the server sends no Retry-After header
+DEFAULT_POLL_DELAY = 0.1
+
+USER_AGENT = "borken-chess/1.0"
+
 
 class ChessComBot:
     """Bot for playing on Chess.com."""
@@ -27,6 +33,9 @@ class ChessComBot:
         self.password = password
         self.engine = engine or ChessEngine(depth=5, time_limit=2.0)
         self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        self._board: Optional[chess.Board] = None  # Game position, updated move by move
+        self._last_position: Optional[str] = None  # _position_key() of the FEN _board matches
         self.is_logged_in = False
         self.game_in_progress = False
         self.current_game_id = None
@@ -82,88 +91,186 @@ class ChessComBot:
             logger.error(f"Error fetching games: {e}")
             return []
     
-    def get_game_state(self, game_id: str) -> Optional[Dict]:
+    def get_best_move(self, board: chess.Board, time_available: float) -> Optional[chess.Move]:
         """
-        Get current state of a game.
+        Get the best move for a position.
         
         Args:
-            game_id: Chess.com game ID
+            board: Current position
+            time_available: Time available for calculation
             
         Returns:
-            Game state data or None
+            Best move
         """
-        try:
-            response = self.session.get(
-                f"https://www.chess.com/api/game/{game_id}"
-            )
+        return self.engine.find_best_move(board, time_available)
+    
+    def _sync_board(self, fen: str) -> chess.Board:
+        """
+        Bring the tracked game board up to date with the server's FEN.
+        
+        The opponent's reply is found among the legal moves and pushed, so
+        the FEN is only parsed on the first call or if the boards diverge.
+        
+        Args:
+            fen: Position FEN reported by the server
             
-            if response.status_code == 200:
-                return response.json()
-            return None
-        except Exception as e:
-            logger.error(f"Error fetching game state: {e}")
+        Returns:
+            Board matching the FEN
+        """
+        position = self._position_key(fen)
+        if self._board is not None and position != self._last_position:
+            move = self._find_move_to(position)
+            if move is not None:
+                self._board.push(move)
+                self._last_position = position
+        
+        if self._board is None or position != self._last_position:
+            self._board = chess.Board(fen)
+            self._last_position = position
+        
+        return self._board
+    
+    @staticmethod
+    def _position_key(fen: str) -> str:
+        """
+        Get the placement, side to move and castling fields of a FEN.
+        
+        The en passant field is left out: servers list it after every
+        double pawn push, while chess.Board.fen() only lists it when an en
+        passant capture is legal.
+        """
+        return " ".join(fen.split()[:3])
+    
+    def _find_move_to(self, position: str) -> Optional[chess.Move]:
+        """Find the legal move from the tracked board that reaches a _position_key()."""
+        # Expand the placement field to one character per square, a8 first
+        placement = position.split(" ", 1)[0].replace("/", "")
+        for digit in "12345678":
+            placement = placement.replace(digit, "." * int(digit))
+        if len(placement) != 64:
             return None
+        
+        board = self._board
+        for move in board.legal_moves:
+            piece = board.piece_at(move.from_square)
+            if move.promotion:
+                piece = chess.Piece(move.promotion, piece.color)
+            if placement[chess.square_mirror(move.to_square)] != piece.symbol():
+                continue
+            board.push(move)
+            reached = self._position_key(board.fen()) == position
+            board.pop()
+            if reached:
+                return move
+        return None
+    
+    def _create_async_session(self) -> aiohttp.ClientSession:
+        """Create an aiohttp session that keeps its connections alive between requests."""
+        connector = aiohttp.TCPConnector(limit_per_host=4, keepalive_timeout=75)
+        return aiohttp.ClientSession(
+            connector=connector,
+            auth=aiohttp.BasicAuth(self.username, self.password),
+            headers={"User-Agent": USER_AGENT}
+        )
     
-    def make_move(self, game_id: str, move: chess.Move) -> bool:
+    async def _poll_game_state(
+        self,
+        session: aiohttp.ClientSession,
+        game_id: str,
+        etag: Optional[str]
+    ) -> Tuple[Optional[Dict], Optional[str], float]:
         """
-        Make a move in a game.
+        Fetch the game state if it changed since the given ETag.
         
         Args:
+            session: Open aiohttp session
             game_id: Chess.com game ID
-            move: Move to make
+            etag: ETag of the last state seen, if any
             
         Returns:
-            True if move successful
+            (state, etag, delay) where state is None if the game has not
+            changed and delay is how long to wait before polling again
         """
+        headers = {"If-None-Match": etag} if etag else {}
+        async with session.get(
+            f"https://www.chess.com/api/game/{game_id}",
+            headers=headers
+        ) as response:
+            delay = self._retry_delay(response)
+            if response.status == 304:
+                return None, etag, delay
+            response.raise_for_status()
+            return await response.json(), response.headers.get("ETag", etag), delay
+    
+    @staticmethod
+    def _retry_delay(response: aiohttp.ClientResponse) -> float:
+        """Get the delay before the next poll from the server's Retry-After header."""
         try:
-            move_uci = move.uci()
-            response = self.session.post(
-                f"https://www.chess.com/api/game/{game_id}/move",
-                json={"move": move_uci}
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"Move {move_uci} made in game {game_id}")
-                return True
-            else:
-                logger.error(f"Failed to make move: {response.status_code}")
-                return False
-        except Exception as e:
-            logger.error(f"Error making move: {e}")
-            return False
+            return float(response.headers.get("Retry-After", DEFAULT_POLL_DELAY))
+        except ValueError:
+            return DEFAULT_POLL_DELAY
     
-    def get_best_move(self, fen: str, time_available: float) -> Optional[chess.Move]:
+    async def _post_move(self, session: aiohttp.ClientSession, game_id: str, move: chess.Move) -> bool:
         """
-        Get the best move for a position.
+        Make a move in a game over the async session.
         
         Args:
-            fen: Position FEN
-            time_available: Time available for calculation
+            session: Open aiohttp session
+            game_id: Chess.com game ID
+            move: Move to make
             
         Returns:
-            Best move
+            True if move successful
         """
-        board = chess.Board(fen)
-        return self.engine.find_best_move(board, time_available)
+        move_uci = move.uci()
+        async with session.post(
+            f"https://www.chess.com/api/game/{game_id}/move",
+            json={"move": move_uci}
+        ) as response:
+            if response.status == 200:
+                logger.info(f"Move {move_uci} made in game {game_id}")
+                return True
+            logger.error(f"Failed to make move: {response.status}")
+            return False
     
-    def play_game(self, game_id: str, max_moves: int = 100):
+    async def play_game(
+        self,
+        game_id: str,
+        max_moves: int = 100,
+        session: Optional[aiohttp.ClientSession] = None
+    ):
         """
         Play a single game.
         
+        The game state is polled with If-None-Match, so the loop only acts
+        when the position has changed, and every poll that does not lead to
+        our move waits for the server's Retry-After delay. The engine search
+        runs in an executor so it does not block the event loop.
+        
         Args:
             game_id: Chess.com game ID
             max_moves: Maximum moves to play before giving up
+            session: Session to reuse across games (a new one is opened if None)
         """
+        if session is None:
+            async with self._create_async_session() as session:
+                return await self.play_game(game_id, max_moves, session)
+        
         self.current_game_id = game_id
         self.game_in_progress = True
+        self._board = None
+        self._last_position = None
         
         moves_played = 0
+        etag = None
+        loop = asyncio.get_running_loop()
         
         while moves_played < max_moves and self.game_in_progress:
             try:
-                game_state = self.get_game_state(game_id)
-                if not game_state:
-                    break
+                game_state, etag, delay = await self._poll_game_state(session, game_id, etag)
+                if game_state is None:
+                    await asyncio.sleep(delay)  # Nothing changed since the last poll
+                    continue
                 
                 # Check if game is still active
                 if game_state.get('game_status') != 'playing':
@@ -173,21 +280,36 @@ class ChessComBot:
                 
                 # Check if it's our turn
                 fen = game_state.get('fen')
-                board = chess.Board(fen)
+                board = self._sync_board(fen)
+                user_color = game_state.get('user_color')
+                if board.turn != (user_color == 'w'):
+                    # The state changes while the opponent thinks (clocks),
+                    # so wait here too rather than re-polling at once
+                    await asyncio.sleep(delay)
+                    continue
                 
                 # Get time available
                 player_info = game_state.get('players', {})
-                our_color = 'white' if game_state.get('user_color') == 'w' else 'black'
+                our_color = 'white' if user_color == 'w' else 'black'
                 our_time = player_info.get(our_color, {}).get('remaining_time', 300)
                 
                 # Calculate time for move (blitz: ~2 seconds, bullet: ~0.5 seconds)
                 time_for_move = min(our_time * 0.05, 3.0)  # Use 5% of remaining time, max 3 seconds
                 
-                # Get best move
-                best_move = self.get_best_move(fen, time_for_move)
+                # Get best move; external engines are awaited directly,
+                # the built-in engine searches in an executor thread
+                search_async = getattr(self.engine, "find_best_move_async", None)
+                if search_async is not None:
+                    best_move = await search_async(board, time_for_move)
+                else:
+                    best_move = await loop.run_in_executor(
+                        None, self.get_best_move, board, time_for_move
+                    )
                 
                 if best_move:
-                    if self.make_move(game_id, best_move):
+                    if await self._post_move(session, game_id, best_move):
+                        board.push(best_move)
+                        self._last_position = self._position_key(board.fen())
                         moves_played += 1
                     else:
                         logger.error("Failed to make move")
@@ -195,9 +317,6 @@ class ChessComBot:
                 else:
                     logger.error("No legal move found")
                     break
-                
-                # Small delay to avoid rate limiting
-                time.sleep(0.5)
             
             except Exception as e:
                 logger.error(f"Error during gameplay: {e}")
@@ -218,28 +337,33 @@ class ChessComBot:
                 logger.error("Cannot play games - not logged in")
                 return
         
+        asyncio.run(self._play_games(max_games))
+    
+    async def _play_games(self, max_games: int):
+        """Play games in one event loop, sharing a single keep-alive session."""
         games_played = 0
         
-        while games_played < max_games:
-            games = self.get_ongoing_games()
-            
-            if not games:
-                logger.info("No ongoing games found")
-                time.sleep(5)
-                continue
-            
-            for game in games:
-                game_id = game.get('game_id')
-                time_class = game.get('time_class', 'blitz')
-                
-                logger.info(f"Starting game {game_id} ({time_class})")
-                self.play_game(game_id)
+        async with self._create_async_session() as session:
+            while games_played < max_games:
+                games = self.get_ongoing_games()
                 
-                games_played += 1
-                if games_played >= max_games:
-                    break
+                if not games:
+                    logger.info("No ongoing games found")
+                    await asyncio.sleep(5)
+                    continue
                 
-                # Rest between games
-                time.sleep(2)
+                for game in games:
+                    game_id = game.get('game_id')
+                    time_class = game.get('time_class', 'blitz')
+                    
+                    logger.info(f"Starting game {game_id} ({time_class})")
+                    await self.play_game(game_id, session=session)
+                    
+                    games_played += 1
+                    if games_played >= max_games:
+                        break
+                    
+                    # Rest between games
+                    await asyncio.sleep(2)
         
         logger.info(f"Completed {games_played} games")
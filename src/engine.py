@@ -1,43 +1,93 @@
 """Chess engine with minimax and alpha-beta pruning."""
 import chess
-from typing import Tuple, Optional, Dict
-from src.evaluation import Evaluator
-from src.opening_book import OpeningBook
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from typing import Iterator, List, Tuple, Optional
+from src.evaluation import Evaluator, PIECE_VALUES
+from src.opening_book import OpeningBook, DEFAULT_BOOK_PATH
+from src.tt import TranspositionTable, EXACT, LOWER, UPPER
+from src.zobrist import ZobristBoard
 import time
 
+# Capture ordering score indexed by [victim type][attacker type]: most
+# valuable victim first, least valuable attacker breaking ties
+MVV_LVA = [
+    [
+        10000 + PIECE_VALUES[victim] - PIECE_VALUES[attacker] // 10
+        if victim and attacker else 0
+        for attacker in range(7)
+    ]
+    for victim in range(7)
+]
+
+# Bound beyond any score, mates (+-100000) included; ints keep comparisons
+# in the search on the int fast path
+INFINITE = 10 ** 7
+
+# Depth reduction for the null-move search, on top of the ply it uses
+NULL_MOVE_REDUCTION = 2
+
+# Deepest ply with its own killer move slots
+MAX_PLY = 128
+
+# Cap on history scores, which are also halved at the start of every search
+HISTORY_MAX = 8000
+
+# Shallower root searches are not worth the round trip to worker processes
+PARALLEL_MIN_DEPTH = 4
+
+# Nodes between checks of the stop signal from the parent process
+STOP_CHECK_NODES = 256
+
 
 class ChessEngine:
     """Advanced chess engine with alpha-beta pruning optimized for blitz."""
     
-    def __init__(self, depth: int = 4, time_limit: float = 2.0):
+    def __init__(self, depth: int = 4, time_limit: float = 2.0, workers: int = 1):
         """
         Initialize the chess engine.
         
         Args:
             depth: Search depth in plies
             time_limit: Time limit for move calculation in seconds
+            workers: Processes to split root moves across (1 searches serially)
         """
         self.depth = depth
         self.time_limit = time_limit
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._stop_workers = None  # Event telling the workers to abandon their searches
+        self._stop_event = None  # The parent's stop_workers event, in a worker
         self.nodes_searched = 0
-        self.opening_book = OpeningBook()
-        self.transposition_table: Dict[str, Tuple[int, int, int]] = {}  # FEN -> (score, depth, flag)
-        self.killer_moves: Dict[int, list] = {}  # Depth -> [move1, move2]
-        self.history: Dict[Tuple, int] = {}  # (from_square, to_square) -> score
+        self.opening_book = OpeningBook.from_polyglot(DEFAULT_BOOK_PATH)
+        self.transposition_table = TranspositionTable()  # Zobrist key -> (depth, flag, score, move)
+        self.killers: List[List[Optional[chess.Move]]] = [
+            [None, None] for _ in range(MAX_PLY)
+        ]  # Ply from root -> [move1, move2]
+        self.history: List[int] = [0] * 4096  # 64 * from_square + to_square -> score
+        self._stopped = False  # Set when the search runs out of time
+        self._root_ply = 0  # Length of the move stack at the search root
     
-    def find_best_move(self, board: chess.Board, time_available: float = None) -> Optional[chess.Move]:
+    def find_best_move(
+        self,
+        board: chess.Board,
+        time_available: float = None,
+        max_depth: Optional[int] = None
+    ) -> Optional[chess.Move]:
         """
         Find the best move for the current position.
         
         Args:
             board: Current chess board state
             time_available: Time available for move in seconds
+            max_depth: Depth cap for this search only (defaults to self.depth)
             
         Returns:
             Best move or None if no legal moves
         """
         # Try opening book first
-        book_move = self.opening_book.get_move(board.fen())
+        book_move = self.opening_book.lookup(board)
         if book_move:
             return book_move
         
@@ -54,46 +104,189 @@ class ChessEngine:
         self.nodes_searched = 0
         start_time = time.time()
         
+        # Age the history scores so earlier searches (and games) count for
+        # less than this one
+        self.history = [score // 2 for score in self.history]
+        
+        # Search on a copy that updates its Zobrist key on every push
+        board = ZobristBoard.from_board(board)
+        self._root_ply = len(board.move_stack)
+        
         best_move = None
-        best_score = float('-inf')
+        guess = 0
+        self._stopped = False
         
-        # Iterative deepening to respect time limit
-        for current_depth in range(1, self.depth + 1):
+        # Iterative deepening to respect time limit, each depth solved with
+        # MTD(f) seeded by the previous depth's score
+        for current_depth in range(1, (max_depth or self.depth) + 1):
             elapsed = time.time() - start_time
             if elapsed > self.time_limit:
                 break
             
-            for move in self._sort_moves(board, legal_moves):
-                board.push(move)
-                score = -self._alphabeta(
-                    board, 
-                    current_depth - 1, 
-                    float('-inf'), 
-                    float('inf'),
-                    start_time
-                )
-                board.pop()
-                
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-                
-                # Check time limit
-                if time.time() - start_time > self.time_limit:
-                    return best_move
+            score, move = self._mtdf(board, guess, current_depth, start_time)
+            if self._stopped:
+                break  # Incomplete iteration, keep the previous depth's move
+            
+            guess = score
+            if move is not None:
+                best_move = move
         
         return best_move if best_move else legal_moves[0]
     
+    def _mtdf(
+        self,
+        board: ZobristBoard,
+        guess: int,
+        depth: int,
+        start_time: float
+    ) -> Tuple[int, Optional[chess.Move]]:
+        """
+        MTD(f): converge on the score of the position with null-window searches.
+        
+        Args:
+            board: Current board state
+            guess: First guess of the score, usually the previous depth's
+            depth: Search depth
+            start_time: Start time for time management
+            
+        Returns:
+            (score, best move), the move taken from the last search that
+            failed high
+        """
+        score = guess
+        lower = -INFINITE
+        upper = INFINITE
+        best_move = None
+        
+        if self.workers > 1 and depth >= PARALLEL_MIN_DEPTH:
+            search = self._search_root_parallel
+        else:
+            search = self._alphabeta
+        
+        while lower < upper and not self._stopped:
+            beta = score + 1 if score == lower else score
+            score = search(board, depth, beta - 1, beta, start_time)
+            if score < beta:
+                upper = score
+            else:
+                lower = score
+                entry = self.transposition_table.probe(board.zobrist_key)
+                if entry is not None and entry[4] is not None:
+                    best_move = entry[4]
+        
+        return score, best_move
+    
+    def _search_root_parallel(
+        self,
+        board: ZobristBoard,
+        depth: int,
+        alpha: int,
+        beta: int,
+        start_time: float
+    ) -> int:
+        """
+        Search the root with its moves split across worker processes.
+        
+        Young Brothers Wait: the first move is searched here to establish
+        alpha, then the remaining moves are searched in parallel with that
+        window, stopping early on a beta cutoff.
+        
+        Args:
+            board: Root board state
+            depth: Search depth
+            alpha: Alpha value for pruning
+            beta: Beta value for pruning
+            start_time: Start time for time management
+            
+        Returns:
+            Score of position in centipawns from the side to move's perspective
+        """
+        key = board.zobrist_key
+        entry = self.transposition_table.probe(key)
+        tt_move = entry[4] if entry is not None else None
+        moves = list(self._ordered_moves(board, tt_move))
+        alpha_orig = alpha
+        
+        # Eldest brother
+        best_move = moves[0]
+        board.push(best_move)
+        best_score = -self._alphabeta(board, depth - 1, -beta, -alpha, start_time)
+        board.pop()
+        
+        if not self._stopped and best_score < beta and len(moves) > 1:
+            alpha = max(alpha, best_score)
+            root_fen = board.root().fen()
+            history = [move.uci() for move in board.move_stack]
+            time_left = self.time_limit - (time.time() - start_time)
+            
+            futures = {
+                self._pool().submit(
+                    _search_root_move, root_fen, history, move.uci(),
+                    depth - 1, -beta, -alpha, time_left
+                ): move
+                for move in moves[1:]
+            }
+            for future in as_completed(futures):
+                score, nodes = future.result()
+                self.nodes_searched += nodes
+                if score is None:
+                    self._stopped = True  # Worker ran out of time
+                    break
+                if -score > best_score:
+                    best_score = -score
+                    best_move = futures[future]
+                    if best_score >= beta:
+                        break
+            
+            # Cancelling only drops queued moves, so tell the running ones
+            # to stop too, and wait for them so the next search starts on
+            # idle workers
+            self._stop_workers.set()
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            self._stop_workers.clear()
+        
+        if self._stopped:
+            return 0
+        
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.transposition_table.store(key, depth, flag, best_score, best_move)
+        return best_score
+    
+    def _pool(self) -> ProcessPoolExecutor:
+        """Get the worker pool, starting it on first use."""
+        if self._executor is None:
+            self._stop_workers = multiprocessing.Event()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self._stop_workers,)
+            )
+        return self._executor
+    
+    def close(self):
+        """Shut down the worker pool, if one was started, and close the opening book."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        self.opening_book.close()
+    
     def _alphabeta(
         self, 
-        board: chess.Board, 
+        board: ZobristBoard, 
         depth: int, 
-        alpha: float, 
-        beta: float,
+        alpha: int, 
+        beta: int,
         start_time: float
     ) -> int:
         """
-        Alpha-beta pruning algorithm.
+        Alpha-beta search with principal variation search (NegaScout).
         
         Args:
             board: Current board state
@@ -103,104 +296,353 @@ class ChessEngine:
             start_time: Start time for time management
             
         Returns:
-            Score of position in centipawns
+            Score of position in centipawns from the side to move's perspective
         """
-        # Check time limit
-        self.nodes_searched += 1
-        if self.nodes_searched % 2048 == 0:
-            if time.time() - start_time > self.time_limit:
-                return Evaluator.evaluate(board)
-        
-        # Transposition table lookup
-        fen = board.fen()
-        if fen in self.transposition_table:
-            trans_score, trans_depth, flag = self.transposition_table[fen]
+        # Resolve captures at the horizon instead of evaluating mid-exchange
+        if depth <= 0:
+            return self._quiesce(board, alpha, beta, start_time)
+        
+        # Check time limit; once out of time every node unwinds without
+        # touching the transposition table
+        if self._tick(start_time):
+            return 0
+        
+        # Transposition table lookup: exact scores are returned, bounds
+        # narrow the window
+        key = board.zobrist_key
+        tt_move = None
+        entry = self.transposition_table.probe(key)
+        if entry is not None:
+            _, trans_depth, flag, trans_score, tt_move = entry
             if trans_depth >= depth:
-                return trans_score
+                if flag == EXACT:
+                    return trans_score
+                if flag == LOWER:
+                    alpha = max(alpha, trans_score)
+                else:
+                    beta = min(beta, trans_score)
+                if alpha >= beta:
+                    return trans_score
+        alpha_orig = alpha
         
         # Terminal nodes
-        if depth == 0 or board.is_game_over():
-            return Evaluator.evaluate(board)
+        if board.is_game_over():
+            return self._evaluate(board)
+        
+        # Null-move pruning: if passing the turn still fails high at reduced
+        # depth, a real move will too. Skipped at the root, after another
+        # null move, in check, and with only pawns left (zugzwang).
+        if (
+            depth >= 3
+            and len(board.move_stack) > self._root_ply
+            and board.move_stack[-1]
+            and not board.is_check()
+            and board.occupied_co[board.turn] & ~(board.pawns | board.kings)
+        ):
+            board.push(chess.Move.null())
+            score = -self._alphabeta(
+                board, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1, start_time
+            )
+            board.pop()
+            if self._stopped:
+                return 0
+            if score >= beta:
+                return beta
         
         # Generate and sort moves
-        legal_moves = list(board.legal_moves)
-        legal_moves = self._sort_moves(board, legal_moves)
+        ply = min(len(board.move_stack) - self._root_ply, MAX_PLY - 1)
+        legal_moves = self._ordered_moves(board, tt_move, ply)
         
-        if not legal_moves:
-            if board.is_checkmate():
-                return -100000
-            return 0  # Stalemate
+        max_score = -INFINITE
+        best_move = None
         
-        max_score = float('-inf')
+        in_check = board.is_check()
+        them = board.occupied_co[not board.turn]
+        killers = self.killers[ply]
         
-        for move in legal_moves:
+        for move_index, move in enumerate(legal_moves):
+            quiet = not (them & chess.BB_SQUARES[move.to_square] or move.promotion)
             board.push(move)
-            score = -self._alphabeta(board, depth - 1, -beta, -alpha, start_time)
+            if move_index == 0:
+                score = -self._alphabeta(board, depth - 1, -beta, -alpha, start_time)
+            else:
+                # Late move reductions: quiet moves ordered late are searched
+                # shallower, and at full depth only if they beat alpha
+                reduction = 0
+                if (
+                    move_index >= 3
+                    and depth >= 3
+                    and quiet
+                    and not in_check
+                    and move not in killers
+                    and not board.is_check()
+                ):
+                    reduction = 1 + int(math.log(depth) * math.log(move_index) / 2)
+                
+                # Principal variation search: prove the move is no better with
+                # a null window, re-search with the full window only if it is
+                score = -self._alphabeta(board, depth - 1 - reduction, -alpha - 1, -alpha, start_time)
+                if reduction and score > alpha:
+                    score = -self._alphabeta(board, depth - 1, -alpha - 1, -alpha, start_time)
+                if alpha < score < beta:
+                    score = -self._alphabeta(board, depth - 1, -beta, -score, start_time)
             board.pop()
             
-            max_score = max(max_score, score)
+            if self._stopped:
+                return 0
+            
+            if score > max_score:
+                max_score = score
+                best_move = move
             alpha = max(alpha, score)
             
             if alpha >= beta:
                 # Update killer moves
-                if move not in self.killer_moves.get(depth, []):
-                    if depth not in self.killer_moves:
-                        self.killer_moves[depth] = []
-                    self.killer_moves[depth].insert(0, move)
-                    if len(self.killer_moves[depth]) > 2:
-                        self.killer_moves[depth].pop()
+                if quiet and move != killers[0]:
+                    killers[1] = killers[0]
+                    killers[0] = move
+                
+                # Reward quiet moves that cut off, more so at greater depth
+                if quiet:
+                    index = 64 * move.from_square + move.to_square
+                    self.history[index] = min(self.history[index] + depth * depth, HISTORY_MAX)
                 break  # Beta cutoff
         
-        # Store in transposition table
-        self.transposition_table[fen] = (max_score, depth, 'exact')
+        # Store in transposition table with how the score relates to the window
+        if max_score <= alpha_orig:
+            flag = UPPER
+        elif max_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.transposition_table.store(key, depth, flag, max_score, best_move)
         
         return max_score
     
-    def _sort_moves(self, board: chess.Board, moves: list) -> list:
+    def _quiesce(
+        self,
+        board: ZobristBoard,
+        alpha: int,
+        beta: int,
+        start_time: float
+    ) -> int:
         """
-        Sort moves by estimated strength (for move ordering optimization).
+        Search captures only until the position is quiet.
+        
+        The side to move may stand pat on the static evaluation, so only
+        captures that improve on it are followed.
         
         Args:
             board: Current board state
-            moves: List of moves to sort
+            alpha: Alpha value for pruning
+            beta: Beta value for pruning
+            start_time: Start time for time management
             
         Returns:
-            Sorted list of moves
+            Score of position in centipawns from the side to move's perspective
         """
-        move_scores = []
+        if self._tick(start_time):
+            return 0
         
-        for move in moves:
-            score = 0
-            
-            # Captures first (using MVV-LVA)
-            if board.is_capture(move):
-                victim_piece = board.piece_at(move.to_square)
-                if victim_piece:
-                    victim_value = PIECE_VALUES.get(victim_piece.piece_type, 0)
-                    attacker_piece = board.piece_at(move.from_square)
-                    attacker_value = PIECE_VALUES.get(attacker_piece.piece_type, 0) if attacker_piece else 0
-                    score += 10000 + victim_value - attacker_value
-            
-            # Killer moves
-            depth_key = self.depth - len(board.move_stack)
-            for i, killer in enumerate(self.killer_moves.get(depth_key, [])):
-                if move == killer:
-                    score += 9000 - i * 100
+        stand_pat = self._evaluate(board)
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        best_score = stand_pat
+        
+        captures = sorted(
+            board.generate_legal_captures(),
+            key=lambda move: MVV_LVA[
+                board.piece_type_at(move.to_square) or chess.PAWN  # En passant
+            ][board.piece_type_at(move.from_square)],
+            reverse=True
+        )
+        
+        for move in captures:
+            board.push(move)
+            score = -self._quiesce(board, -beta, -alpha, start_time)
+            board.pop()
             
-            # History heuristic
-            history_key = (move.from_square, move.to_square)
-            score += self.history.get(history_key, 0)
+            if self._stopped:
+                return 0
             
-            # Checks
-            if board.gives_check(move):
-                score += 1000
+            if score > best_score:
+                best_score = score
+                if score >= beta:
+                    break
+                alpha = max(alpha, score)
+        
+        return best_score
+    
+    def _tick(self, start_time: float) -> bool:
+        """Count a node and return True once the search is out of time or stopped."""
+        if self._stopped:
+            return True
+        self.nodes_searched += 1
+        if self.nodes_searched % STOP_CHECK_NODES == 0:
+            if self._stop_event is not None and self._stop_event.is_set():
+                self._stopped = True
+            elif self.nodes_searched % 2048 == 0 and time.time() - start_time > self.time_limit:
+                self._stopped = True
+        return self._stopped
+    
+    @staticmethod
+    def _evaluate(board: chess.Board) -> int:
+        """Static evaluation from the side to move's perspective."""
+        score = Evaluator.evaluate(board)
+        return score if board.turn == chess.WHITE else -score
+    
+    def _ordered_moves(
+        self,
+        board: chess.Board,
+        tt_move: Optional[chess.Move] = None,
+        ply: int = 0
+    ) -> Iterator[chess.Move]:
+        """
+        Generate legal moves best-first, in stages.
+        
+        The transposition table move comes first, then captures by MVV-LVA,
+        then killer moves, then the remaining quiet moves by history (with a
+        bonus for direct checks). Each stage is only generated once the
+        previous one is used up, so a cutoff on an early move skips the
+        work of ordering the rest.
+        
+        Args:
+            board: Current board state
+            tt_move: Best move stored in the transposition table, searched first
+            ply: Distance from the search root, selecting the killer moves
             
-            move_scores.append((score, move))
+        Yields:
+            Each legal move exactly once
+        """
+        if tt_move is not None and board.is_legal(tt_move):
+            yield tt_move
+        
+        captures = [move for move in board.generate_legal_captures() if move != tt_move]
+        captures.sort(
+            key=lambda move: MVV_LVA[
+                board.piece_type_at(move.to_square) or chess.PAWN  # En passant
+            ][board.piece_type_at(move.from_square)],
+            reverse=True
+        )
+        yield from captures
+        
+        # Killers are quiet moves, but may be illegal or captures here
+        them = board.occupied_co[not board.turn]
+        skip = {None, tt_move}
+        for killer in self.killers[ply]:
+            if (
+                killer not in skip
+                and not them & chess.BB_SQUARES[killer.to_square]
+                and board.is_legal(killer)
+                and not board.is_en_passant(killer)
+            ):
+                skip.add(killer)
+                yield killer
+        
+        quiets = [
+            move for move in board.generate_legal_moves(chess.BB_ALL, ~them)
+            if move not in skip
+            and not (move.to_square == board.ep_square and board.is_en_passant(move))
+        ]
+        check_squares = self._check_squares(board)
+        history = self.history
+        quiets.sort(
+            key=lambda move: (
+                history[64 * move.from_square + move.to_square]
+                + (1000 if check_squares[move.promotion or board.piece_type_at(move.from_square)]
+                   & chess.BB_SQUARES[move.to_square] else 0)
+                + (PIECE_VALUES[move.promotion] * 10 if move.promotion else 0)
+            ),
+            reverse=True
+        )
+        yield from quiets
+    
+    @staticmethod
+    def _check_squares(board: chess.Board) -> List[int]:
+        """
+        Get, per piece type, the squares from which a piece of the side to
+        move would attack the enemy king.
         
-        # Sort by score (descending)
-        move_scores.sort(key=lambda x: x[0], reverse=True)
-        return [move for _, move in move_scores]
+        Sliders use the current occupancy, so checks discovered by the
+        moving piece leaving its square are not counted.
+        
+        Returns:
+            Bitboards indexed by piece type
+        """
+        king = board.king(not board.turn)
+        if king is None:
+            return [chess.BB_EMPTY] * 7
+        occupied = board.occupied
+        diagonal = chess.BB_DIAG_ATTACKS[king][chess.BB_DIAG_MASKS[king] & occupied]
+        straight = (
+            chess.BB_RANK_ATTACKS[king][chess.BB_RANK_MASKS[king] & occupied]
+            | chess.BB_FILE_ATTACKS[king][chess.BB_FILE_MASKS[king] & occupied]
+        )
+        return [
+            chess.BB_EMPTY,
+            chess.BB_PAWN_ATTACKS[not board.turn][king],
+            chess.BB_KNIGHT_ATTACKS[king],
+            diagonal,
+            straight,
+            diagonal | straight,
+            chess.BB_EMPTY,
+        ]
+
+
+# Engine reused by _search_root_move across calls in a worker process, so
+# its transposition table carries over between root moves and depths
+_worker_engine: Optional[ChessEngine] = None
+
+# Event set by the parent process when running root searches are no longer needed
+_worker_stop_event = None
 
 
-# Import piece values for move ordering
-from src.evaluation import PIECE_VALUES
+def _init_worker(stop_event):
+    """Keep the parent's stop event in a newly started worker process."""
+    global _worker_stop_event
+    _worker_stop_event = stop_event
+
+
+def _search_root_move(
+    root_fen: str,
+    history: List[str],
+    move_uci: str,
+    depth: int,
+    alpha: int,
+    beta: int,
+    time_limit: float
+) -> Tuple[Optional[int], int]:
+    """
+    Search one root move in a worker process.
+    
+    Args:
+        root_fen: FEN of the position the game started from
+        history: Moves (UCI) from root_fen to the search root
+        move_uci: Root move to search
+        depth: Remaining depth after the move
+        alpha: Alpha value for pruning, from the moved side's opponent's view
+        beta: Beta value for pruning, from the moved side's opponent's view
+        time_limit: Time left for the search in seconds
+        
+    Returns:
+        (score after the move, nodes searched), score None if out of time
+        or stopped by the parent
+    """
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = ChessEngine()
+        _worker_engine._stop_event = _worker_stop_event
+    engine = _worker_engine
+    
+    board = ZobristBoard(root_fen)
+    for uci in history:
+        board.push_uci(uci)
+    engine._root_ply = len(board.move_stack)
+    board.push_uci(move_uci)
+    
+    engine.nodes_searched = 0
+    engine.time_limit = time_limit
+    engine._stopped = False
+    score = engine._alphabeta(board, depth, alpha, beta, time.time())
+    return (None if engine._stopped else score), engine.nodes_searched
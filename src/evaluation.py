@@ -1,6 +1,8 @@
 """Board evaluation and position scoring."""
 import chess
-from typing import Dict
+from collections import OrderedDict
+from typing import List, Sequence
+from src.bitboard import PIECE_ORDER, piece_bitboards
 
 # Piece values (in centipawns)
 PIECE_VALUES = {
@@ -99,19 +101,100 @@ PST_TABLES = {
 }
 
 
+def _build_psqt(king_pst: List[int]) -> List[List[int]]:
+    """
+    Build signed material plus piece-square tables indexed like piece_bitboards().
+    
+    The tables above are laid out as seen from white's side (rank 8
+    first), so white reads them with the rank flipped (square ^ 56) and
+    black reads them as is, which is the same table mirrored vertically.
+    Black entries are negated so the sum over all pieces is the score from
+    white's perspective.
+    """
+    psqt = []
+    for color, piece_type in PIECE_ORDER:
+        pst = king_pst if piece_type == chess.KING else PST_TABLES[piece_type]
+        value = PIECE_VALUES[piece_type]
+        if color == chess.WHITE:
+            psqt.append([value + pst[square ^ 56] for square in chess.SQUARES])
+        else:
+            psqt.append([-(value + pst[square]) for square in chess.SQUARES])
+    return psqt
+
+
+PSQT_MID = _build_psqt(KING_PST_MID)
+PSQT_END = _build_psqt(KING_PST_END)
+
+
+def _psqt_sum(bitboards: Sequence[int], psqt: List[List[int]]) -> int:
+    """Sum table values over the set bits of each piece bitboard."""
+    total = 0
+    for table, bb in zip(psqt, bitboards):
+        while bb:
+            lsb = bb & -bb
+            total += table[lsb.bit_length() - 1]
+            bb ^= lsb
+    return total
+
+
+# Bonus for each castling right still held, keyed by the rook's square
+CASTLING_BONUS = (
+    (chess.BB_H1, 25),
+    (chess.BB_A1, 20),
+    (chess.BB_H8, -25),
+    (chess.BB_A8, -20),
+)
+
+
+# Bonus per pawn on each rank for advancing, from each side's point of view
+WHITE_PAWN_RANK_BONUS = [(rank - 1) * 5 for rank in range(8)]
+BLACK_PAWN_RANK_BONUS = [(6 - rank) * 5 for rank in range(8)]
+
+
+def evaluate_core(bitboards: Sequence[int], castling_rights: int, endgame: bool) -> int:
+    """
+    Score material, piece placement, castling rights and pawn advancement
+    from plain integers.
+    
+    Nothing here touches a chess.Board, so this part of the evaluation is
+    a tight loop over ints.
+    
+    Args:
+        bitboards: Piece bitboards as returned by piece_bitboards()
+        castling_rights: Mask of rook squares with castling rights
+        endgame: Whether to use the endgame king table
+        
+    Returns:
+        Score in centipawns from white's perspective
+    """
+    score = _psqt_sum(bitboards, PSQT_END if endgame else PSQT_MID)
+    for mask, bonus in CASTLING_BONUS:
+        if castling_rights & mask:
+            score += bonus
+    
+    white_pawns = bitboards[0]
+    black_pawns = bitboards[len(chess.PIECE_TYPES)]
+    for rank, rank_bb in enumerate(chess.BB_RANKS):
+        score += WHITE_PAWN_RANK_BONUS[rank] * chess.popcount(white_pawns & rank_bb)
+        score -= BLACK_PAWN_RANK_BONUS[rank] * chess.popcount(black_pawns & rank_bb)
+    return score
+
+
+# Cache of evaluate() results keyed on a hash of the position (FIFO eviction).
+# An OrderedDict pops its oldest entry in constant time; evicting from a plain
+# dict with next(iter()) slows down as deleted slots pile up at its front.
+EVAL_CACHE_SIZE = 1 << 18
+_eval_cache: "OrderedDict[int, int]" = OrderedDict()
+
+
 class Evaluator:
     """Evaluates chess positions."""
     
     @staticmethod
     def is_endgame(board: chess.Board) -> bool:
         """Determine if position is in endgame."""
-        queens = len(board.pieces(chess.QUEEN, chess.WHITE)) + \
-                 len(board.pieces(chess.QUEEN, chess.BLACK))
-        rooks = len(board.pieces(chess.ROOK, chess.WHITE)) + \
-                len(board.pieces(chess.ROOK, chess.BLACK))
-        
         # Endgame if no queens and less than 2 rooks total
-        return queens == 0 and rooks <= 1
+        return not board.queens and chess.popcount(board.rooks) <= 1
     
     @staticmethod
     def evaluate(board: chess.Board) -> int:
@@ -119,7 +202,22 @@ class Evaluator:
         Evaluate the position from white's perspective.
         Positive score = white advantage, negative = black advantage.
         Returns score in centipawns.
+        
+        Results are cached per position, so positions reached again by
+        transposition are not re-evaluated.
         """
+        key = hash(board._transposition_key())
+        score = _eval_cache.get(key)
+        if score is None:
+            score = Evaluator._evaluate(board)
+            if len(_eval_cache) >= EVAL_CACHE_SIZE:
+                _eval_cache.popitem(last=False)
+            _eval_cache[key] = score
+        return score
+    
+    @staticmethod
+    def _evaluate(board: chess.Board) -> int:
+        """Evaluate the position from white's perspective without the cache."""
         if board.is_checkmate():
             # If white to move and checkmate, white lost
             return -100000 if board.turn else 100000
@@ -128,116 +226,28 @@ class Evaluator:
             return 0
         
         score = 0
-        is_endgame = Evaluator.is_endgame(board)
         
         # Heavy penalty if in check - opponent has tactical advantage
         if board.is_check():
             score -= 200
         
-        # Material count
-        for piece_type in PIECE_VALUES:
-            white_count = len(board.pieces(piece_type, chess.WHITE))
-            black_count = len(board.pieces(piece_type, chess.BLACK))
-            score += (white_count - black_count) * PIECE_VALUES[piece_type]
-        
-        # Piece-square tables
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece is None:
-                continue
-            
-            value = 0
-            if piece.piece_type == chess.KING:
-                pst = KING_PST_END if is_endgame else KING_PST_MID
-            else:
-                pst = PST_TABLES.get(piece.piece_type, [0] * 64)
-            
-            # Flip board perspective for black pieces
-            square_idx = square if piece.color == chess.WHITE else 63 - square
-            value = pst[square_idx]
-            
-            if piece.color == chess.WHITE:
-                score += value
-            else:
-                score -= value
-        
-        # Bonus for king safety
-        score += Evaluator._king_safety(board)
-        
-        # Bonus for pawn structure
-        score += Evaluator._pawn_structure(board)
-        
-        # Evaluate tactical threats
-        score += Evaluator._threats(board)
-        
-        return score
-    
-    @staticmethod
-    def _king_safety(board: chess.Board) -> int:
-        """Evaluate king safety."""
-        score = 0
-        
-        # White king safety
-        white_king = board.king(chess.WHITE)
-        white_shield = len(board.pieces(chess.PAWN, chess.WHITE))
-        
-        # Black king safety
-        black_king = board.king(chess.BLACK)
-        black_shield = len(board.pieces(chess.PAWN, chess.BLACK))
-        
-        # Bonus for castling rights
-        if board.has_kingside_castling_rights(chess.WHITE):
-            score += 25
-        if board.has_queenside_castling_rights(chess.WHITE):
-            score += 20
-        if board.has_kingside_castling_rights(chess.BLACK):
-            score -= 25
-        if board.has_queenside_castling_rights(chess.BLACK):
-            score -= 20
-        
-        return score
-    
-    @staticmethod
-    def _pawn_structure(board: chess.Board) -> int:
-        """Evaluate pawn structure."""
-        score = 0
-        
-        white_pawns = board.pieces(chess.PAWN, chess.WHITE)
-        black_pawns = board.pieces(chess.PAWN, chess.BLACK)
-        
-        # Bonus for advanced pawns
-        for pawn in white_pawns:
-            rank = chess.square_rank(pawn)
-            score += (rank - 1) * 5
-        
-        for pawn in black_pawns:
-            rank = chess.square_rank(pawn)
-            score -= (6 - rank) * 5
+        # Material, piece-square tables, castling rights and pawn structure
+        score += evaluate_core(
+            piece_bitboards(board),
+            board.clean_castling_rights(),
+            Evaluator.is_endgame(board)
+        )
         
         return score
     
     @staticmethod
-    def _threats(board: chess.Board) -> int:
-        """Evaluate threats and tactical opportunities."""
-        score = 0
-        
-        # Bonus for opponent's pieces under attack
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece is None:
-                continue
-            
-            # Count attacking moves on this piece
-            attackers = len(board.attackers(not piece.color, square))
-            defenders = len(board.attackers(piece.color, square))
-            
-            piece_value = PIECE_VALUES.get(piece.piece_type, 0)
-            
-            # If piece is under attack and undefended, penalize opponent
-            if attackers > defenders and defenders == 0:
-                if piece.color == chess.WHITE:
-                    score -= piece_value // 2
-                else:
-                    score += piece_value // 2
+    def evaluate_base(board: chess.BaseBoard) -> int:
+        """
+        Evaluate material and piece placement from white's perspective.
         
-        return score
+        Only the piece bitboards are read, so this also works on a
+        chess.BaseBoard and skips the check, mate, castling and pawn terms of
+        evaluate(). Returns score in centipawns.
+        """
+        psqt = PSQT_END if Evaluator.is_endgame(board) else PSQT_MID
+        return _psqt_sum(piece_bitboards(board), psqt)
@@ -4,6 +4,7 @@ Provides two helpers:
 - `ExternalEngine`: simple per-move invocation (keeps compatibility)
 - `PersistentExternalEngine`: keeps a UCI engine process alive for lower latency
 """
+import asyncio
 import atexit
 from typing import Optional
 
@@ -86,6 +87,28 @@ class PersistentExternalEngine:
         except Exception:
             return None
 
+    async def find_best_move_async(self, board: chess.Board, time_available: float = 0.6) -> Optional[chess.Move]:
+        """Like `find_best_move`, but awaitable without blocking the event loop.
+
+        The search is sent to the engine's own protocol loop, so the caller
+        can keep doing I/O, or await several engines at once with
+        `asyncio.gather`, while the engines think.
+        """
+        if self._engine is None:
+            self._start_engine()
+            if self._engine is None:
+                return None
+
+        try:
+            limit = chess.engine.Limit(time=time_available)
+            protocol = self._engine.protocol
+            # The engine reads the board while we await, so give it a copy
+            coro = asyncio.wait_for(protocol.play(board.copy(), limit), time_available + 10.0)
+            result = await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, protocol.loop))
+            return result.move
+        except Exception:
+            return None
+
     def close(self) -> None:
         try:
             if self._engine is not None:
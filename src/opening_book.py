@@ -1,9 +1,28 @@
 """Opening book for standard chess openings."""
 import chess
-from typing import Optional, Dict
+import chess.polyglot
+from typing import Optional, Dict, Tuple
 import json
 import os
 
+# Book moves from the starting position, parsed once at import
+STARTING_MOVES = (
+    chess.Move.from_uci("e2e4"),  # 1.e4
+    chess.Move.from_uci("d2d4"),  # 1.d4
+    chess.Move.from_uci("c2c4"),  # 1.c4
+    chess.Move.from_uci("g1f3"),  # 1.Nf3
+)
+
+# Polyglot book the engine opens by default, if present
+DEFAULT_BOOK_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "book.bin"
+)
+
+
+def _position_key(fen: str) -> Tuple:
+    """Get the position key (board._transposition_key()) for a FEN."""
+    return chess.Board(fen)._transposition_key()
+
 
 class OpeningBook:
     """Manages opening book moves."""
@@ -11,19 +30,36 @@ class OpeningBook:
     def __init__(self):
         """Initialize opening book with common moves."""
         self.book = self._create_book()
+        self._index = self._build_index()
+        self.reader: Optional[chess.polyglot.MemoryMappedReader] = None
+    
+    @classmethod
+    def from_polyglot(cls, filepath: str) -> 'OpeningBook':
+        """
+        Create an opening book backed by a Polyglot .bin file.
+        
+        The file is memory-mapped and probed by Zobrist key. If it does
+        not exist, the book falls back to the built-in moves.
+        
+        Args:
+            filepath: Path to the Polyglot book
+        """
+        book = cls()
+        if os.path.exists(filepath):
+            book.reader = chess.polyglot.MemoryMappedReader(filepath)
+        return book
     
     def _create_book(self) -> Dict[str, list]:
         """Create opening book with common openings."""
         return {
             # Starting position
-            chess.STARTING_FEN: [
-                chess.Move.from_uci("e2e4"),  # 1.e4
-                chess.Move.from_uci("d2d4"),  # 1.d4
-                chess.Move.from_uci("c2c4"),  # 1.c4
-                chess.Move.from_uci("g1f3"),  # 1.Nf3
-            ],
+            chess.STARTING_FEN: list(STARTING_MOVES),
         }
     
+    def _build_index(self) -> Dict[Tuple, list]:
+        """Index the book's move lists by position key."""
+        return {_position_key(fen): moves for fen, moves in self.book.items()}
+    
     def get_move(self, fen: str) -> Optional[chess.Move]:
         """
         Get a move from the opening book.
@@ -34,17 +70,58 @@ class OpeningBook:
         Returns:
             Suggested move or None
         """
-        if fen in self.book:
-            moves = self.book[fen]
-            if moves:
-                # Return first move (can be randomized for variety)
-                return moves[0]
+        # Match on the position key so the move counters in the FEN don't matter
+        return self.get_move_by_key(_position_key(fen))
+    
+    def get_move_by_key(self, key: Tuple) -> Optional[chess.Move]:
+        """
+        Get a move from the opening book by position key.
+        
+        Looking up board._transposition_key() avoids building a FEN, and
+        matches the position regardless of the move counters.
+        
+        Args:
+            key: Position key from board._transposition_key()
+            
+        Returns:
+            Suggested move or None
+        """
+        moves = self._index.get(key)
+        if moves:
+            return moves[0]
         return None
     
+    def lookup(self, board: chess.Board) -> Optional[chess.Move]:
+        """
+        Get a move for a board, from the Polyglot book if one is open.
+        
+        Polyglot moves are chosen at random, weighted by their entry
+        weights; positions it does not cover fall back to the built-in book.
+        
+        Args:
+            board: Current position
+            
+        Returns:
+            Suggested move or None
+        """
+        if self.reader is not None:
+            try:
+                return self.reader.weighted_choice(board).move
+            except IndexError:
+                pass
+        return self.get_move_by_key(board._transposition_key())
+    
+    def close(self):
+        """Close the Polyglot book, if one is open."""
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+    
     def add_opening(self, fen: str, move: chess.Move):
         """Add a move to the opening book."""
         if fen not in self.book:
             self.book[fen] = []
+            self._index[_position_key(fen)] = self.book[fen]
         if move not in self.book[fen]:
             self.book[fen].append(move)
     
@@ -67,3 +144,4 @@ class OpeningBook:
                 self.book = {}
                 for fen, uci_moves in data.items():
                     self.book[fen] = [chess.Move.from_uci(uci) for uci in uci_moves]
+                self._index = self._build_index()
@@ -0,0 +1,66 @@
+"""Fixed-size transposition table keyed by 64-bit Zobrist hashes."""
+import chess
+from typing import List, Optional, Tuple
+
+# Entry flags: how the stored score relates to the true value
+EXACT = 0
+LOWER = 1  # Search failed high, score is a lower bound
+UPPER = 2  # Search failed low, score is an upper bound
+
+# (key, depth, flag, score, best_move)
+Entry = Tuple[int, int, int, int, Optional[chess.Move]]
+
+
+class TranspositionTable:
+    """
+    Preallocated table of two-slot buckets indexed by the low bits of the key.
+
+    The first slot of each bucket keeps the deepest search seen for its
+    index, the second always takes the newest entry that could not go in
+    the first, so deep results survive while recent ones still get cached.
+    """
+
+    def __init__(self, size_bits: int = 20):
+        """
+        Initialize the table.
+
+        Args:
+            size_bits: log2 of the number of slots (two per bucket)
+        """
+        self.size = 1 << size_bits
+        self._mask = self.size - 2  # Index of the bucket's first slot
+        self._entries: List[Optional[Entry]] = [None] * self.size
+
+    def probe(self, key: int) -> Optional[Entry]:
+        """Get the entry stored for a key, or None."""
+        index = key & self._mask
+        entry = self._entries[index]
+        if entry is not None and entry[0] == key:
+            return entry
+        entry = self._entries[index + 1]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, flag: int, score: int, move: Optional[chess.Move] = None):
+        """
+        Store an entry, in the depth-preferred slot if it is at least as deep
+        as what is there, otherwise in the always-replace slot.
+
+        Args:
+            key: Zobrist key of the position
+            depth: Remaining depth the score was searched to
+            flag: EXACT, LOWER or UPPER
+            score: Search score of the position
+            move: Best move found, if any
+        """
+        index = key & self._mask
+        old = self._entries[index]
+        if old is None or old[0] == key or depth >= old[1]:
+            self._entries[index] = (key, depth, flag, score, move)
+        else:
+            self._entries[index + 1] = (key, depth, flag, score, move)
+
+    def clear(self):
+        """Remove all entries."""
+        self._entries = [None] * self.size
@@ -81,31 +81,30 @@ class UCIInterface:
         """Handle 'ucinewgame' command."""
         self.board = chess.Board()
         self.engine.transposition_table.clear()
+        self.engine.history = [0] * len(self.engine.history)
     
     def _cmd_position(self, parts: list):
         """Handle 'position' command."""
         if len(parts) < 2:
             return
         
+        # The FEN runs up to "moves", so FENs without move counters work too
+        moves_index = parts.index("moves") if "moves" in parts else len(parts)
+        
         if parts[1] == "startpos":
             self.board = chess.Board()
-            move_start = 3 if len(parts) > 2 and parts[2] == "moves" else len(parts)
         elif parts[1] == "fen":
-            fen = " ".join(parts[2:8])
+            fen = " ".join(parts[2:moves_index])
             self.board = chess.Board(fen)
-            move_start = 8 if len(parts) > 8 and parts[8] == "moves" else len(parts)
         else:
             return
         
-        # Apply moves
-        if move_start < len(parts):
-            for move_uci in parts[move_start:]:
-                try:
-                    move = chess.Move.from_uci(move_uci)
-                    if move in self.board.legal_moves:
-                        self.board.push(move)
-                except:
-                    pass
+        # Apply moves; push_uci() checks legality without listing legal moves
+        for move_uci in parts[moves_index + 1:]:
+            try:
+                self.board.push_uci(move_uci)
+            except ValueError:
+                pass
     
     def _cmd_go(self, parts: list):
         """Handle 'go' command."""
@@ -0,0 +1,98 @@
+"""Board that keeps its Polyglot Zobrist hash up to date move by move."""
+import chess
+import chess.polyglot
+from typing import List, Union
+
+from src.bitboard import PIECE_ORDER, piece_bitboards
+
+_RANDOM = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+
+# Polyglot piece keys indexed like piece_bitboards(), then by square
+_PIECE_KEYS: List[List[int]] = [
+    [_RANDOM[64 * ((piece_type - 1) * 2 + color) + square] for square in chess.SQUARES]
+    for color, piece_type in PIECE_ORDER
+]
+
+_TURN_KEY = _RANDOM[780]
+
+_HASHER = chess.polyglot.ZobristHasher(_RANDOM)
+
+
+class ZobristBoard(chess.Board):
+    """
+    chess.Board whose zobrist_key always equals chess.polyglot.zobrist_hash().
+
+    push() XORs in only the squares whose pieces changed, plus the castling,
+    en passant and turn terms, and pop() restores the previous key from a
+    stack, so reading the key costs nothing during search. set_fen() and the
+    other setters that go through clear_stack(), root(), and the transform
+    and mirror methods rehash. Assigning turn, castling_rights, ep_square or
+    the bitboards directly does not; call rehash() afterwards.
+    """
+
+    zobrist_key = 0
+    _key_stack: List[int]
+
+    @classmethod
+    def from_board(cls, board: chess.Board) -> "ZobristBoard":
+        """Copy a board, including its move stack, into a ZobristBoard."""
+        zboard = cls(board.root().fen(), chess960=board.chess960)
+        for move in board.move_stack:
+            zboard.push(move)
+        return zboard
+
+    def rehash(self):
+        """Recompute the key from scratch."""
+        self.zobrist_key = chess.polyglot.zobrist_hash(self)
+
+    def clear_stack(self):
+        super().clear_stack()
+        self._key_stack = []
+        self.rehash()
+
+    def root(self) -> "ZobristBoard":
+        board = super().root()
+        board.rehash()
+        return board
+
+    def apply_transform(self, f):
+        super().apply_transform(f)
+        self.rehash()
+
+    def apply_mirror(self):
+        super().apply_mirror()
+        self.rehash()
+
+    def push(self, move: chess.Move):
+        before = piece_bitboards(self)
+        castling = self.castling_rights
+        castling_key = _HASHER.hash_castling(self) if castling else 0
+        key = self.zobrist_key ^ _HASHER.hash_ep_square(self)
+
+        super().push(move)
+
+        for keys, old, new in zip(_PIECE_KEYS, before, piece_bitboards(self)):
+            changed = old ^ new
+            while changed:
+                lsb = changed & -changed
+                key ^= keys[lsb.bit_length() - 1]
+                changed ^= lsb
+        if castling != self.castling_rights:
+            key ^= castling_key ^ _HASHER.hash_castling(self)
+        key ^= _HASHER.hash_ep_square(self) ^ _TURN_KEY
+
+        self._key_stack.append(self.zobrist_key)
+        self.zobrist_key = key
+
+    def pop(self) -> chess.Move:
+        move = super().pop()
+        self.zobrist_key = self._key_stack.pop()
+        return move
+
+    def copy(self, *, stack: Union[bool, int] = True) -> "ZobristBoard":
+        board = super().copy(stack=stack)
+        board.zobrist_key = self.zobrist_key
+        kept = len(board.move_stack)
+        board._key_stack = self._key_stack[len(self._key_stack) - kept:]
+        return board
+
@@ -1,75 +1,430 @@
 """Tests for chess engine."""
+import asyncio
+import collections
+import functools
+import random
+import time
 import unittest
+from unittest import mock
 import chess
+import chess.polyglot
 from src.engine import ChessEngine
 from src.board import ChessBoard
+from src.chesscom_bot import ChessComBot, DEFAULT_POLL_DELAY
+from src.uci_interface import UCIInterface
 from src.evaluation import Evaluator
+from src.tt import TranspositionTable, EXACT, LOWER
+from src.zobrist import ZobristBoard
+
+
+# Starting position template; tests take copies and never mutate it
+_STARTPOS = chess.Board()
+
+# Legal moves from the start position, generated once
+_LEGAL_STARTPOS = list(_STARTPOS.legal_moves)
+
+# Scholar's Mate: 1.e4 e5 2.Bc4 Nc6 3.Qh5 Nf6?? 4.Qxf7#, parsed once
+_SCHOLARS_MATE = tuple(
+    chess.Move.from_uci(uci)
+    for uci in ("e2e4", "e7e5", "f1c4", "b8c6", "d1h5", "g8f6", "h5f7")
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _scholars_mate_board() -> chess.Board:
+    """Get the position after Scholar's Mate; callers must not mutate it."""
+    board = _STARTPOS.copy(stack=False)
+    for move in _SCHOLARS_MATE:
+        board.push(move)
+    return board
+
+
+@functools.lru_cache(maxsize=1)
+def _scholars_mate_is_mate() -> bool:
+    """Check once per session whether Scholar's Mate ends in checkmate."""
+    return _scholars_mate_board().is_checkmate()
+
+
+def _is_mate_fast(board: chess.Board) -> bool:
+    """
+    Check for checkmate, stopping at the first legal move.
+    
+    Positions not in check are rejected before any move generation, so
+    not-mate assertions stay cheap.
+    """
+    return board.is_check() and next(iter(board.legal_moves), None) is None
+
+
+def _perft(board: chess.Board, depth: int) -> int:
+    """Count the leaf nodes of the legal move tree to the given depth."""
+    if depth <= 1:
+        return board.legal_moves.count() if depth == 1 else 1
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += _perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+_E2E4 = chess.Move.from_uci("e2e4")
+
+# Back-rank mate in one: 1.Rd8#
+_BACK_RANK_FEN = "6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1"
+
+# 1.e4 d5 2.exd5, white up a pawn
+_IMBALANCE_FEN = "rnbqkbnr/ppp1pppp/8/3P4/8/8/PPPP1PPP/RNBQKBNR b KQkq - 0 2"
+
+# Positions for the batch evaluation check
+_BENCH_FENS = (
+    chess.STARTING_FEN,
+    _IMBALANCE_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "6k1/5ppp/8/8/8/8/1Q3PPP/6K1 w - - 0 1",
+)
+
+
+def setUpModule():
+    """Run one evaluation before any test so import or setup errors show up here."""
+    Evaluator.evaluate(chess.Board())
 
 
 class TestEngine(unittest.TestCase):
     """Test chess engine functionality."""
     
+    @classmethod
+    def setUpClass(cls):
+        """
+        Set up the engine once; its tables are allocated up front.
+        
+        Tests only read positions they build themselves, so they can run in
+        any order or split across pytest-xdist workers, each of which gets
+        its own engine.
+        """
+        cls.engine = ChessEngine(depth=1, time_limit=0.01)
+    
     def setUp(self):
         """Set up test fixtures."""
-        self.engine = ChessEngine(depth=3, time_limit=1.0)
         self.board = ChessBoard()
     
-    def test_legal_moves(self):
-        """Test that engine generates legal moves."""
-        board = chess.Board()
-        moves = list(board.legal_moves)
-        self.assertEqual(len(moves), 20)  # 20 legal moves in starting position
+    def _deep_engine(self) -> ChessEngine:
+        """Get an engine that searches deep enough to judge move quality."""
+        return ChessEngine(depth=4, time_limit=2.0)
     
     def test_engine_finds_move(self):
         """Test that engine finds a move."""
+        # Any legal move passes, so the shallow class engine is enough
         move = self.engine.find_best_move(self.board.board)
         self.assertIsNotNone(move)
     
     def test_simple_mate_detection(self):
         """Test mate detection with Scholar's Mate."""
-        # Scholar's Mate: 1.e4 e5 2.Bc4 Nc6 3.Qh5 Nf6?? 4.Qxf7#
-        board = chess.Board()
-        board.push_san("e4")
-        board.push_san("e5")
-        board.push_san("Bc4")
-        board.push_san("Nc6")
-        board.push_san("Qh5")
-        board.push_san("Nf6")
-        board.push_san("Qxf7")
-        
-        self.assertTrue(board.is_checkmate())
+        self.assertTrue(_scholars_mate_is_mate())
+        self.assertTrue(_is_mate_fast(_scholars_mate_board()))
+        self.assertFalse(_is_mate_fast(_STARTPOS))
+        # Scores are from white's perspective, and white delivered the mate
+        self.assertGreater(Evaluator.evaluate(_scholars_mate_board()), 9000)
     
-    def test_evaluation_pieces(self):
-        """Test basic material evaluation."""
-        # Starting position should be equal
-        board = chess.Board()
-        score = Evaluator.evaluate(board)
-        self.assertAlmostEqual(score, 0, delta=50)
+    def test_finds_mate_in_one(self):
+        """Test that the search plays mate in one at every depth."""
+        scholars = _scholars_mate_board().copy()
+        scholars.pop()
+        cases = (
+            (chess.Board(_BACK_RANK_FEN), "d1d8"),
+            (scholars, "h5f7"),
+        )
+        for board, mate in cases:
+            for depth in range(1, 5):
+                with self.subTest(fen=board.fen(), depth=depth):
+                    # A fresh engine, so no depth benefits from an earlier search
+                    move = self._deep_engine().find_best_move(board, max_depth=depth)
+                    self.assertEqual(move, chess.Move.from_uci(mate))
+    
+    def test_parallel_search(self):
+        """Test that the multi-process root search finds mate and close() stops the pool."""
+        engine = ChessEngine(depth=4, time_limit=10.0, workers=2)
+        try:
+            move = engine.find_best_move(chess.Board(_BACK_RANK_FEN))
+            self.assertEqual(move, chess.Move.from_uci("d1d8"))
+            pool = engine._executor
+            self.assertIsNotNone(pool)  # Depth 4 searched the root in parallel
+        finally:
+            engine.close()
+        self.assertIsNone(engine._executor)
+        with self.assertRaises(RuntimeError):
+            pool.submit(int)
+    
+    def test_close_releases_book(self):
+        """Test that close() closes a memory-mapped Polyglot book."""
+        engine = ChessEngine(depth=1, time_limit=0.01)
+        reader = mock.Mock()
+        engine.opening_book.reader = reader
+        engine.close()
+        reader.close.assert_called_once_with()
+        self.assertIsNone(engine.opening_book.reader)
     
-    def test_board_make_move(self):
-        """Test board move making."""
-        self.assertTrue(self.board.make_move_san("e4"))
-        self.assertEqual(self.board.board.move_stack[-1], chess.Move.from_uci("e2e4"))
+    def test_history_aging(self):
+        """Test that each search halves the history scores."""
+        engine = ChessEngine(depth=1, time_limit=0.01)
+        engine.history[0] = 8000  # a1a1, which no search can reward
+        engine.find_best_move(chess.Board(_IMBALANCE_FEN))
+        self.assertEqual(engine.history[0], 4000)
     
-    def test_board_undo(self):
-        """Test board undo."""
-        self.board.make_move_san("e4")
-        move = self.board.undo_move()
-        self.assertEqual(move, chess.Move.from_uci("e2e4"))
+    def test_board_basics(self):
+        """Test legal move generation, move making and undo."""
+        with self.subTest(name="legal_moves"):
+            self.assertEqual(len(_LEGAL_STARTPOS), 20)  # 20 legal moves in starting position
+        
+        with self.subTest(name="make_move"):
+            self.assertTrue(self.board.make_move_san("e4"))
+            self.assertEqual(self.board.board.move_stack[-1], _E2E4)
+        
+        with self.subTest(name="undo"):
+            board = ChessBoard()
+            board.make_move_san("e4")
+            move = board.undo_move()
+            self.assertEqual(move, _E2E4)
+    
+    def test_perft_depth3(self):
+        """Test move generation node count and speed to depth 3."""
+        board = _STARTPOS.copy(stack=False)
+        start = time.perf_counter()
+        self.assertEqual(_perft(board, 3), 8902)
+        # Takes ~15ms; the budget only catches large move generation slowdowns
+        self.assertLess(time.perf_counter() - start, 0.5)
 
 
 class TestEvaluation(unittest.TestCase):
     """Test evaluation function."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Build the evaluated positions once; evaluation never mutates them."""
+        cls.startpos = chess.Board()
+        cls.imbalance = chess.Board(_IMBALANCE_FEN)
+    
+    def test_evaluation_pieces(self):
+        """Test basic material evaluation."""
+        # Starting position should be equal
+        score = Evaluator.evaluate(self.startpos)
+        self.assertIsInstance(score, int)  # Centipawns are integers
+        self.assertLessEqual(abs(score), 50)
+    
     def test_material_imbalance(self):
         """Test evaluation with material imbalance."""
-        board = chess.Board()
-        board.push_san("e4")
-        board.push_san("d5")
-        board.push_san("exd5")
-        
-        score = Evaluator.evaluate(board)
+        score = Evaluator.evaluate(self.imbalance)
         self.assertGreater(score, 0)  # White should be winning (up a pawn)
+    
+    def test_eval_cache_bounded(self):
+        """Test that the evaluation cache evicts its oldest entries once full."""
+        cache = collections.OrderedDict()
+        with mock.patch("src.evaluation.EVAL_CACHE_SIZE", 8), \
+                mock.patch("src.evaluation._eval_cache", cache):
+            for move in _LEGAL_STARTPOS:
+                board = _STARTPOS.copy(stack=False)
+                board.push(move)
+                score = Evaluator.evaluate(board)
+                self.assertLessEqual(len(cache), 8)
+            self.assertEqual(len(cache), 8)
+            # The newest position is kept and served from the cache
+            self.assertEqual(next(reversed(cache.values())), score)
+            self.assertEqual(Evaluator.evaluate(board), score)
+    
+    def test_batch_evaluation(self):
+        """Test evaluation symmetry over a batch of positions."""
+        positions = [chess.Board(fen) for fen in _BENCH_FENS]
+        for board in positions:
+            with self.subTest(fen=board.fen()):
+                # Swapping colors must negate the score
+                self.assertEqual(
+                    Evaluator.evaluate_base(board.mirror()),
+                    -Evaluator.evaluate_base(board)
+                )
+
+
+# Playout starts for the Zobrist tests: castling rights on both wings,
+# en passant chances and pawns one step from promoting
+_ZOBRIST_FENS = (
+    chess.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1",
+)
+
+
+class TestZobrist(unittest.TestCase):
+    """Test that the incremental Zobrist key matches a full rehash."""
+    
+    def assertKeyMatches(self, board: ZobristBoard):
+        self.assertEqual(board.zobrist_key, chess.polyglot.zobrist_hash(board), board.fen())
+    
+    def test_random_playouts(self):
+        """Test the key after every push and pop in random games."""
+        rng = random.Random(1234)
+        for fen in _ZOBRIST_FENS:
+            with self.subTest(fen=fen):
+                for _ in range(10):
+                    board = ZobristBoard(fen)
+                    for _ in range(60):
+                        moves = list(board.legal_moves)
+                        if not moves:
+                            break
+                        if not board.is_check() and rng.random() < 0.05:
+                            board.push(chess.Move.null())
+                        else:
+                            board.push(rng.choice(moves))
+                        self.assertKeyMatches(board)
+                        if rng.random() < 0.2:
+                            board.pop()
+                            self.assertKeyMatches(board)
+                    while board.move_stack:
+                        board.pop()
+                        self.assertKeyMatches(board)
+    
+    def test_copy_and_set_fen(self):
+        """Test the key on copies, converted boards, roots and mirrors."""
+        board = ZobristBoard.from_board(_scholars_mate_board())
+        self.assertKeyMatches(board)
+        
+        copy = board.copy(stack=2)
+        copy.pop()
+        self.assertKeyMatches(copy)
+        
+        board.set_fen(_IMBALANCE_FEN)
+        self.assertKeyMatches(board)
+        board.push(chess.Move.from_uci("e7e5"))
+        self.assertKeyMatches(board)
+        
+        # Positions restored or transformed wholesale are rehashed
+        self.assertKeyMatches(board.root())
+        self.assertKeyMatches(board.mirror())
+        self.assertKeyMatches(board.transform(chess.flip_horizontal))
+        root = ZobristBoard.from_board(_scholars_mate_board()).root()
+        self.assertKeyMatches(root)
+        root.push(_E2E4)
+        self.assertKeyMatches(root)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    """Test the two-slot bucket replacement rule."""
+    
+    def setUp(self):
+        """Set up a 16-slot table and three keys sharing bucket 2."""
+        self.tt = TranspositionTable(size_bits=4)
+        self.deep, self.shallow, self.newest = 2, 2 + 16, 2 + 32
+    
+    def test_shallower_collision(self):
+        """Test that a shallower colliding key goes to the second slot."""
+        self.tt.store(self.deep, 5, EXACT, 10)
+        self.tt.store(self.shallow, 2, LOWER, 20)
+        self.assertEqual(self.tt.probe(self.deep), (self.deep, 5, EXACT, 10, None))
+        self.assertEqual(self.tt.probe(self.shallow), (self.shallow, 2, LOWER, 20, None))
+        
+        # The second slot always takes the newest shallower entry
+        self.tt.store(self.newest, 1, EXACT, 30)
+        self.assertIsNone(self.tt.probe(self.shallow))
+        self.assertIsNotNone(self.tt.probe(self.deep))
+        self.assertIsNotNone(self.tt.probe(self.newest))
+    
+    def test_same_key_overwrite(self):
+        """Test that a key replaces its own entry even at lower depth."""
+        self.tt.store(self.deep, 5, EXACT, 10)
+        self.tt.store(self.shallow, 2, LOWER, 20)
+        self.tt.store(self.deep, 1, LOWER, 40, _E2E4)
+        self.assertEqual(self.tt.probe(self.deep), (self.deep, 1, LOWER, 40, _E2E4))
+        self.assertIsNotNone(self.tt.probe(self.shallow))
+    
+    def test_clear(self):
+        """Test that clear() removes every entry."""
+        self.tt.store(self.deep, 5, EXACT, 10)
+        self.tt.store(self.shallow, 2, LOWER, 20)
+        self.tt.clear()
+        self.assertIsNone(self.tt.probe(self.deep))
+        self.assertIsNone(self.tt.probe(self.shallow))
+
+
+class TestUCIPosition(unittest.TestCase):
+    """Test parsing of the UCI 'position' command."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up one interface; each command replaces its board."""
+        cls.uci = UCIInterface()
+    
+    def test_fen_without_counters(self):
+        """Test a four-field FEN followed by moves."""
+        self.uci._handle_command(
+            "position fen rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 moves e7e5 g1f3"
+        )
+        self.assertEqual(
+            self.uci.board.fen(),
+            "rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2"
+        )
+    
+    def test_skips_bad_moves(self):
+        """Test that malformed and illegal moves are skipped."""
+        self.uci._handle_command("position startpos moves e2e4 zzzz e7e5 e1e3")
+        self.assertEqual(self.uci.board.move_stack, [_E2E4, chess.Move.from_uci("e7e5")])
+    
+    def test_fen_without_moves(self):
+        """Test a full FEN with no 'moves' section."""
+        self.uci._handle_command(f"position fen {_IMBALANCE_FEN}")
+        self.assertEqual(self.uci.board.fen(), _IMBALANCE_FEN)
+        self.assertEqual(self.uci.board.move_stack, [])
+
+
+def _fake_response(status: int, state=None, headers=None) -> mock.MagicMock:
+    """Build an aiohttp-style response context manager for a mocked session."""
+    response = mock.MagicMock()
+    response.status = status
+    response.headers = headers or {}
+    response.json = mock.AsyncMock(return_value=state)
+    context = mock.MagicMock()
+    context.__aenter__.return_value = response
+    return context
+
+
+class TestChessComBot(unittest.TestCase):
+    """Test the Chess.com polling loop against a mocked session."""
+    
+    def test_play_game_polling(self):
+        """Test that every poll not ending in our move waits before the next."""
+        after_e4 = chess.Board()
+        after_e4.push(_E2E4)
+        session = mock.MagicMock()
+        session.get.side_effect = [
+            _fake_response(304, headers={"Retry-After": "0.25"}),
+            # White to move while we play black: no ETag, so no 304 next time
+            _fake_response(200, {"game_status": "playing", "fen": chess.STARTING_FEN, "user_color": "b"}),
+            _fake_response(200, {"game_status": "playing", "fen": after_e4.fen(), "user_color": "b"}),
+        ]
+        session.post.return_value = _fake_response(200)
+        bot = ChessComBot("user", "password", ChessEngine(depth=1, time_limit=0.01))
+        
+        with mock.patch("src.chesscom_bot.asyncio.sleep", new=mock.AsyncMock()) as sleep:
+            asyncio.run(bot.play_game("1", max_moves=1, session=session))
+        
+        self.assertEqual([c.args[0] for c in sleep.await_args_list], [0.25, DEFAULT_POLL_DELAY])
+        self.assertEqual(session.get.call_count, 3)
+        posted = chess.Move.from_uci(session.post.call_args.kwargs["json"]["move"])
+        self.assertIn(posted, after_e4.legal_moves)
+    
+    def test_sync_board(self):
+        """Test that server FENs are followed move by move, keeping history."""
+        bot = ChessComBot("user", "password", ChessEngine(depth=1, time_limit=0.01))
+        board = bot._sync_board(chess.STARTING_FEN)
+        
+        # Servers list the en passant square after every double push
+        bot._sync_board("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1")
+        synced = bot._sync_board("rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2")
+        self.assertIs(synced, board)
+        self.assertEqual(board.move_stack, [_E2E4, chess.Move.from_uci("e7e5")])
+        
+        # A position no single move reaches is parsed from scratch
+        synced = bot._sync_board(_IMBALANCE_FEN)
+        self.assertEqual(synced.fen(), _IMBALANCE_FEN)
+        self.assertEqual(synced.move_stack, [])
 
 
 if __name__ == "__main__":